@@ -1,9 +1,128 @@
 import wikipedia
 import re
-from difflib import SequenceMatcher
+import shelve
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Tuple, Optional, List, Dict
 import datetime
 
+UNIT_PATTERN = re.compile(r'\b(?:meters?|km|miles?|feet|inches|kg|pounds?|tons?|celsius|fahrenheit|square\s+\w+)\b')
+# Measurements and dates in a single scan; only the units are case-insensitive
+FACT_PATTERN = re.compile(
+    r'\b(?:(?P<measurement>\d+(?:\.\d+)?\s*(?i:meters?|km|miles?|feet|inches|kg|pounds?|tons?|celsius|fahrenheit|square\s+\w+))'
+    r'|(?P<date>\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)|(?:19|20)\d{2}))\b'
+)
+WORD_PATTERN = re.compile(r'\w+')
+SENTENCE_BREAK_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+# On-disk cache for Wikipedia responses, shared across sessions
+CACHE_PATH = '.wiki_cache'
+CACHE_TTL = 24 * 60 * 60  # seconds before a cached response is fetched again
+_cache_lock = threading.Lock()
+CACHED_CONTENT_CHARS = 2000  # Article text kept per cached page
+
+MAX_FETCH_WORKERS = 8  # Concurrent Wikipedia requests per search
+
+# Errors that just mean a candidate article could not be used; network errors
+# from requests are OSError subclasses
+FETCH_ERRORS = (wikipedia.exceptions.WikipediaException, KeyError, OSError)
+
+EARLY_EXIT_SCORE = 0.85  # Relevance above which no further candidates are checked
+RESPONSE_CACHE_SIZE = 256  # Formatted answers kept per WikiBot
+
+def _prune_expired(cache) -> None:
+    """Deletes cache entries older than CACHE_TTL."""
+    now = time.time()
+    for key in list(cache.keys()):
+        if now - cache[key][0] >= CACHE_TTL:
+            del cache[key]
+
+_cache_pruned = False  # Expired entries are pruned once per process, on first write
+
+def _memoize(key: str, fetch):
+    """Returns a cached Wikipedia response, fetching and storing it on a miss."""
+    global _cache_pruned
+    with _cache_lock, shelve.open(CACHE_PATH) as cache:
+        entry = cache.get(key)
+    if entry and time.time() - entry[0] < CACHE_TTL:
+        return entry[1]
+    
+    value = fetch()
+    with _cache_lock, shelve.open(CACHE_PATH) as cache:
+        if not _cache_pruned:
+            _prune_expired(cache)
+            _cache_pruned = True
+        cache[key] = (time.time(), value)
+    return value
+
+def cached_search(query: str, results: int = 8) -> List[str]:
+    """Cached wrapper around wikipedia.search."""
+    return _memoize(f'search:{results}:{query}', lambda: wikipedia.search(query, results=results))
+
+@dataclass(slots=True)
+class CachedPage:
+    """The parts of a Wikipedia page the researcher reads."""
+    title: str
+    url: str
+    content: str  # Only the first CACHED_CONTENT_CHARS characters
+    content_length: int
+
+def cached_page(title: str) -> CachedPage:
+    """Cached wrapper around wikipedia.page.
+    
+    Only the fields callers read are stored, as a plain dict, so cache entries
+    stay small and do not depend on the wikipedia package's page class.
+    """
+    def fetch():
+        page = wikipedia.page(title)
+        return {
+            'title': page.title,
+            'url': page.url,
+            'content': page.content[:CACHED_CONTENT_CHARS],
+            'content_length': len(page.content)
+        }
+    return CachedPage(**_memoize(f'page:{CACHED_CONTENT_CHARS}:{title}', fetch))
+
+def cached_has_references(title: str) -> bool:
+    """Cached check for whether a page lists any references."""
+    return _memoize(f'references:{title}', lambda: bool(wikipedia.page(title, auto_suggest=False).references))
+
+def leading_sentences(content: str, sentences: int = 3) -> str:
+    """Returns the first few sentences of an article's introduction."""
+    intro = content.split('\n==', 1)[0].strip()
+    return ' '.join(SENTENCE_BREAK_PATTERN.split(intro, maxsplit=sentences)[:sentences])
+
+@dataclass(slots=True)
+class QueryInfo:
+    """Result of analyzing a user query."""
+    original_query: str
+    corrected_query: str
+    query_type: str
+    is_measurement: bool
+    is_time: bool
+    needs_verification: bool
+
+@dataclass(slots=True)
+class SearchResult:
+    """Answer found for a query, or an error when title is 'Error'."""
+    title: str
+    summary: str
+    confidence: str
+    source_url: Optional[str]
+
+def tokenize(text: str) -> frozenset:
+    """Splits already lowercased text into a set of words."""
+    return frozenset(WORD_PATTERN.findall(text))
+
+def token_overlap(query_tokens: frozenset, text_tokens: frozenset) -> float:
+    """Jaccard similarity between two word sets."""
+    shared = len(query_tokens & text_tokens)
+    if not shared:
+        return 0.0
+    return shared / len(query_tokens | text_tokens)
+
 class LanguageProcessor:
     """Handles language processing and validation."""
     
@@ -29,6 +148,9 @@ class LanguageProcessor:
             'age', 'era', 'dynasty', 'born', 'died',
             'established', 'founded', 'discovered', 'invented'
         }
+        
+        # Keywords that call for additional verification
+        self.verification_keywords = {'exact', 'precise', 'accurate', 'specific', 'official'}
     
     def correct_spelling(self, text: str) -> str:
         """Corrects common spelling mistakes."""
@@ -36,24 +158,35 @@ class LanguageProcessor:
         corrected_words = [self.spelling_corrections.get(word, word) for word in words]
         return ' '.join(corrected_words)
     
+    def classify(self, text: str) -> Dict[str, bool]:
+        """Checks all keyword sets against the words of the query in one pass."""
+        tokens = tokenize(text.lower())
+        return {
+            'measurement': not self.measurement_keywords.isdisjoint(tokens),
+            'time': not self.time_keywords.isdisjoint(tokens),
+            'verify': not self.verification_keywords.isdisjoint(tokens)
+        }
+    
     def is_measurement_query(self, text: str) -> bool:
         """Checks if query is asking for measurements."""
-        return any(keyword in text.lower() for keyword in self.measurement_keywords)
+        return self.classify(text)['measurement']
     
     def is_time_query(self, text: str) -> bool:
         """Checks if query is asking for dates/time information."""
-        return any(keyword in text.lower() for keyword in self.time_keywords)
+        return self.classify(text)['time']
     
     def extract_measurement_units(self, text: str) -> List[str]:
         """Extracts measurement units from text."""
-        unit_pattern = r'\b(?:meters?|km|miles?|feet|inches|kg|pounds?|tons?|celsius|fahrenheit|square\s+\w+)\b'
-        return re.findall(unit_pattern, text.lower())
+        return UNIT_PATTERN.findall(text.lower())
+
+# Shared by every analyzer and researcher; its keyword sets and patterns are read-only
+LANGUAGE_PROCESSOR = LanguageProcessor()
 
 class QueryAnalyzer:
     """Analyzes and processes search queries."""
     
-    def __init__(self):
-        self.language_processor = LanguageProcessor()
+    def __init__(self, language_processor: Optional[LanguageProcessor] = None):
+        self.language_processor = language_processor or LANGUAGE_PROCESSOR
         
         # Categories for different types of queries
         self.query_categories = {
@@ -64,8 +197,11 @@ class QueryAnalyzer:
             'reason': r'\b(why|reason|cause)\b',
             'process': r'\b(how|process|method)\b'
         }
+        self._compiled_categories = {
+            category: re.compile(pattern) for category, pattern in self.query_categories.items()
+        }
     
-    def analyze_query(self, query: str) -> Dict[str, any]:
+    def analyze_query(self, query: str) -> QueryInfo:
         """Analyzes the query and returns relevant information."""
         # Correct spelling
         corrected_query = self.language_processor.correct_spelling(query)
@@ -74,49 +210,43 @@ class QueryAnalyzer:
         query_type = self._determine_query_type(corrected_query)
         
         # Check for special cases
-        is_measurement = self.language_processor.is_measurement_query(corrected_query)
-        is_time = self.language_processor.is_time_query(corrected_query)
+        flags = self.language_processor.classify(corrected_query)
         
-        return {
-            'original_query': query,
-            'corrected_query': corrected_query,
-            'query_type': query_type,
-            'is_measurement': is_measurement,
-            'is_time': is_time,
-            'needs_verification': self._needs_verification(corrected_query)
-        }
+        return QueryInfo(
+            original_query=query,
+            corrected_query=corrected_query,
+            query_type=query_type,
+            is_measurement=flags['measurement'],
+            is_time=flags['time'],
+            needs_verification=flags['verify']
+        )
     
     def _determine_query_type(self, query: str) -> str:
         """Determines the type of query being asked."""
-        for category, pattern in self.query_categories.items():
-            if re.search(pattern, query.lower()):
+        query_lower = query.lower()
+        for category, pattern in self._compiled_categories.items():
+            if pattern.search(query_lower):
                 return category
         return 'general'
-    
-    def _needs_verification(self, query: str) -> bool:
-        """Determines if the query needs additional verification."""
-        verification_keywords = {'exact', 'precise', 'accurate', 'specific', 'official'}
-        return any(keyword in query.lower() for keyword in verification_keywords)
 
 class WikipediaResearcher:
     """Handles Wikipedia searches with enhanced accuracy."""
     
-    def __init__(self):
-        self.language_processor = LanguageProcessor()
+    def __init__(self, language_processor: Optional[LanguageProcessor] = None):
+        self.language_processor = language_processor or LANGUAGE_PROCESSOR
+        self.executor = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS)
     
-    def search(self, query_info: Dict[str, any]) -> Dict[str, any]:
+    def search(self, query_info: QueryInfo) -> SearchResult:
         """Performs an enhanced Wikipedia search."""
         try:
             # Get search results
-            search_results = wikipedia.search(query_info['corrected_query'], results=8)
+            search_results = cached_search(query_info.corrected_query, results=8)
             if not search_results:
                 return self._format_error("No results found")
             
             # Process results based on query type
-            if query_info['is_measurement']:
-                return self._handle_measurement_query(search_results, query_info)
-            elif query_info['is_time']:
-                return self._handle_time_query(search_results, query_info)
+            if query_info.is_measurement or query_info.is_time:
+                return self._handle_fact_query(search_results, query_info)
             else:
                 return self._handle_general_query(search_results, query_info)
                 
@@ -125,106 +255,129 @@ class WikipediaResearcher:
         except Exception as e:
             return self._format_error(str(e))
     
-    def _handle_measurement_query(self, results: List[str], query_info: Dict[str, any]) -> Dict[str, any]:
-        """Handles queries about measurements."""
-        for result in results:
+    def _handle_fact_query(self, results: List[str], query_info: QueryInfo) -> SearchResult:
+        """Handles queries about measurements and/or dates."""
+        # Fetch all candidate pages concurrently, then inspect them in ranking order
+        pages = [self.executor.submit(cached_page, result) for result in results]
+        for future in pages:
             try:
-                page = wikipedia.page(result)
-                content = page.content[:2000]  # Look in first 2000 chars
+                page = future.result()
+                facts = self._extract_facts(page.content[:2000])  # Look in first 2000 chars
                 
-                # Extract measurement information
-                measurements = self._extract_measurements(content)
-                if measurements:
-                    return {
-                        'title': page.title,
-                        'summary': self._format_measurement_response(measurements),
-                        'confidence': 'High' if len(measurements) > 1 else 'Medium',
-                        'source_url': page.url
-                    }
-            except:
+                # Keep only the kinds of information the query asked for
+                measurements = facts['measurement'] if query_info.is_measurement else []
+                dates = facts['date'] if query_info.is_time else []
+                if measurements or dates:
+                    responses = []
+                    if measurements:
+                        responses.append(self._format_measurement_response(measurements))
+                    if dates:
+                        responses.append(self._format_date_response(dates))
+                    self._cancel_pending(pages)
+                    return SearchResult(
+                        title=page.title,
+                        summary='\n'.join(responses),
+                        confidence='High' if max(len(measurements), len(dates)) > 1 else 'Medium',
+                        source_url=page.url
+                    )
+            except FETCH_ERRORS:
                 continue
         return self._handle_general_query(results, query_info)
     
-    def _handle_time_query(self, results: List[str], query_info: Dict[str, any]) -> Dict[str, any]:
-        """Handles queries about dates and times."""
-        for result in results:
-            try:
-                page = wikipedia.page(result)
-                content = page.content[:2000]
-                
-                # Extract date information
-                dates = self._extract_dates(content)
-                if dates:
-                    return {
-                        'title': page.title,
-                        'summary': self._format_date_response(dates),
-                        'confidence': 'High' if len(dates) > 1 else 'Medium',
-                        'source_url': page.url
-                    }
-            except:
-                continue
-        return self._handle_general_query(results, query_info)
-    
-    def _handle_general_query(self, results: List[str], query_info: Dict[str, any]) -> Dict[str, any]:
+    def _handle_general_query(self, results: List[str], query_info: QueryInfo) -> SearchResult:
         """Handles general queries with enhanced validation."""
-        best_result = None
-        best_score = 0
+        query_tokens = tokenize(query_info.corrected_query)
+        candidates = []
         
-        for result in results:
+        # The summary comes from the already fetched page content, so each
+        # candidate costs a single page fetch (plus a pooled reference check
+        # when the query asks for verification)
+        pages = [
+            self.executor.submit(self._fetch_candidate, result, query_info.needs_verification)
+            for result in results
+        ]
+        for future in pages:
             try:
-                page = wikipedia.page(result)
-                summary = wikipedia.summary(result, sentences=3)
+                page, has_references = future.result()
+                summary = leading_sentences(page.content, sentences=3)
                 
                 # Calculate relevance score
-                score = self._calculate_relevance(query_info['corrected_query'], page.title, summary)
+                score = self._calculate_relevance(query_info.corrected_query, query_tokens, page.title, summary)
                 
                 # Verify information if needed
-                if query_info['needs_verification']:
-                    score = self._verify_information(score, page)
+                if query_info.needs_verification:
+                    score = self._verify_information(score, page, has_references)
+                
+                candidates.append((score, page, summary))
                 
-                if score > best_score:
-                    best_score = score
-                    best_result = {
-                        'title': page.title,
-                        'summary': summary,
-                        'confidence': self._get_confidence_level(score),
-                        'source_url': page.url
-                    }
-            except:
+                # A near-certain match ends the search; skip fetches not yet started
+                if score > EARLY_EXIT_SCORE:
+                    self._cancel_pending(pages)
+                    break
+            except FETCH_ERRORS:
                 continue
         
-        return best_result if best_result else self._format_error("Could not find relevant information")
+        # Pick the best candidate once, after all of them are scored
+        if not candidates:
+            return self._format_error("Could not find relevant information")
+        best_score, page, summary = max(candidates, key=lambda candidate: candidate[0])
+        if best_score <= 0:
+            return self._format_error("Could not find relevant information")
+        
+        return SearchResult(
+            title=page.title,
+            summary=summary,
+            confidence=self._get_confidence_level(best_score),
+            source_url=page.url
+        )
     
-    def _extract_measurements(self, text: str) -> List[str]:
-        """Extracts measurement information from text."""
-        measurement_pattern = r'\b\d+(?:\.\d+)?\s*(?:meters?|km|miles?|feet|inches|kg|pounds?|tons?|celsius|fahrenheit|square\s+\w+)\b'
-        return re.findall(measurement_pattern, text, re.IGNORECASE)
+    def _cancel_pending(self, futures) -> None:
+        """Cancels page fetches that have not started yet."""
+        for future in futures:
+            future.cancel()
     
-    def _extract_dates(self, text: str) -> List[str]:
-        """Extracts date information from text."""
-        date_pattern = r'\b(?:\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)|(?:19|20)\d{2})\b'
-        return re.findall(date_pattern, text)
+    def _extract_facts(self, text: str) -> Dict[str, List[str]]:
+        """Extracts measurement and date information from text in one pass."""
+        facts = {'measurement': [], 'date': []}
+        for match in FACT_PATTERN.finditer(text):
+            facts[match.lastgroup].append(match.group())
+        return facts
     
-    def _calculate_relevance(self, query: str, title: str, summary: str) -> float:
+    def _calculate_relevance(self, query: str, query_tokens: frozenset, title: str, summary: str) -> float:
         """Calculates relevance score with enhanced accuracy."""
+        query_lower = query.lower()
+        title_lower = title.lower()
+        summary_lower = summary.lower()
+        
         # Base similarity scores
-        title_score = SequenceMatcher(None, query.lower(), title.lower()).ratio()
-        summary_score = SequenceMatcher(None, query.lower(), summary.lower()).ratio()
+        title_score = token_overlap(query_tokens, tokenize(title_lower))
+        summary_score = token_overlap(query_tokens, tokenize(summary_lower))
         
         # Weight factors
         score = (title_score * 0.4) + (summary_score * 0.6)
         
         # Boost score for exact matches
-        if query.lower() in title.lower() or query.lower() in summary.lower():
+        if query_lower in title_lower or query_lower in summary_lower:
             score += 0.2
             
         return min(score, 1.0)
     
-    def _verify_information(self, base_score: float, page) -> float:
+    def _fetch_candidate(self, result: str, check_references: bool) -> Tuple[CachedPage, bool]:
+        """Fetches a candidate page and, if asked, whether it lists references."""
+        page = cached_page(result)
+        has_references = False
+        if check_references:
+            try:
+                has_references = cached_has_references(page.title)
+            except FETCH_ERRORS:
+                pass  # A failed reference lookup only forgoes the bonus
+        return page, has_references
+    
+    def _verify_information(self, base_score: float, page: CachedPage, has_references: bool) -> float:
         """Additional verification for accuracy."""
-        if page.references:
+        if has_references:
             base_score += 0.1
-        if len(page.content) > 1000:  # Substantial article
+        if page.content_length > 1000:  # Substantial article
             base_score += 0.1
         return min(base_score, 1.0)
     
@@ -250,14 +403,14 @@ class WikipediaResearcher:
             return "No specific dates found."
         return "Found dates: " + ", ".join(dates)
     
-    def _format_error(self, message: str) -> Dict[str, any]:
+    def _format_error(self, message: str) -> SearchResult:
         """Formats error response."""
-        return {
-            'title': 'Error',
-            'summary': message,
-            'confidence': 'None',
-            'source_url': None
-        }
+        return SearchResult(
+            title='Error',
+            summary=message,
+            confidence='None',
+            source_url=None
+        )
 
 class WikiBot:
     """Main chatbot class with enhanced accuracy and response handling."""
@@ -265,26 +418,37 @@ class WikiBot:
     def __init__(self):
         self.query_analyzer = QueryAnalyzer()
         self.researcher = WikipediaResearcher()
+        self._cache = {}  # Formatted responses keyed by corrected query
     
     def get_response(self, user_input: str) -> str:
         """Processes user input and returns enhanced response."""
         # Analyze query
         query_info = self.query_analyzer.analyze_query(user_input)
         
+        # Reuse the answer to a query already asked this session
+        cache_key = query_info.corrected_query
+        if cache_key in self._cache:
+            # Move the hit to the end so the least recently used answer is evicted first
+            response = self._cache[cache_key] = self._cache.pop(cache_key)
+            return response
+        
         # Get Wikipedia results
         result = self.researcher.search(query_info)
         
-        # Format response
-        if result['title'] == 'Error':
-            return result['summary']
+        # Format response; errors are not cached so they can be retried
+        if result.title == 'Error':
+            return result.summary
             
-        response = f"Topic: {result['title']}\n"
-        response += f"Confidence: {result['confidence']}\n\n"
-        response += result['summary']
+        response = f"Topic: {result.title}\n"
+        response += f"Confidence: {result.confidence}\n\n"
+        response += result.summary
         
-        if result['source_url']:
-            response += f"\n\nSource: {result['source_url']}"
-            
+        if result.source_url:
+            response += f"\n\nSource: {result.source_url}"
+        
+        if len(self._cache) >= RESPONSE_CACHE_SIZE:
+            del self._cache[next(iter(self._cache))]  # Drop the least recently used answer
+        self._cache[cache_key] = response
         return response
 
 def main():
@@ -1,6 +1,10 @@
 import wikipedia
+import heapq
 import re
-from difflib import SequenceMatcher
+import shelve
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Enhanced unwanted keywords for better filtering
 UNWANTED_KEYWORDS = [
@@ -8,33 +12,96 @@ UNWANTED_KEYWORDS = [
     "television", "TV series", "manga", "anime", "fictional", "game",
     "painting", "artwork", "novel", "book", "movie"
 ]
+UNWANTED_PATTERN = re.compile('|'.join(re.escape(word) for word in UNWANTED_KEYWORDS), re.IGNORECASE)
+
+WHAT_IS_PATTERN = re.compile(r'what\s+is\s+(?:a|an|the)?\s*(.+)')
+
+# Phrases suggesting an article is about a specific person, place or work
+SPECIFIC_INDICATORS = [
+    'is a', 'was a', 'refers to',
+    'born', 'died', 'located in',
+    'written by', 'directed by', 'created by'
+]
+SPECIFIC_INDICATOR_PATTERN = re.compile('|'.join(map(re.escape, SPECIFIC_INDICATORS)), re.IGNORECASE)
+
+# Question words, articles and punctuation stripped from queries in one pass
+FILLER_PATTERN = re.compile(r"\b(?:what|who|where|when|how|is|are|was|were|a|an|the)\b|[^\w\s]")
+WORD_PATTERN = re.compile(r'\w+')
+
+# On-disk cache for Wikipedia responses, shared across sessions
+CACHE_PATH = '.wiki_cache'
+CACHE_TTL = 24 * 60 * 60  # seconds before a cached response is fetched again
+_cache_lock = threading.Lock()
+
+# Thread pool for fetching candidate summaries concurrently
+_executor = ThreadPoolExecutor(max_workers=8)
+
+# Errors that just mean a candidate article could not be used; network errors
+# from requests are OSError subclasses
+FETCH_ERRORS = (wikipedia.exceptions.WikipediaException, KeyError, OSError)
+
+def _prune_expired(cache):
+    """Delete cache entries older than CACHE_TTL."""
+    now = time.time()
+    for key in list(cache.keys()):
+        if now - cache[key][0] >= CACHE_TTL:
+            del cache[key]
+
+_cache_pruned = False  # Expired entries are pruned once per process, on first write
+
+def _memoize(key, fetch):
+    """Return a cached Wikipedia response, fetching and storing it on a miss."""
+    global _cache_pruned
+    with _cache_lock, shelve.open(CACHE_PATH) as cache:
+        entry = cache.get(key)
+    if entry and time.time() - entry[0] < CACHE_TTL:
+        return entry[1]
+    
+    value = fetch()
+    with _cache_lock, shelve.open(CACHE_PATH) as cache:
+        if not _cache_pruned:
+            _prune_expired(cache)
+            _cache_pruned = True
+        cache[key] = (time.time(), value)
+    return value
+
+def cached_search(query, results=8):
+    """Cached wrapper around wikipedia.search."""
+    return _memoize(f'search:{results}:{query}', lambda: wikipedia.search(query, results=results))
+
+def cached_summary(title, sentences):
+    """Cached wrapper around wikipedia.summary."""
+    return _memoize(f'summary:{sentences}:{title}', lambda: wikipedia.summary(title, sentences=sentences))
+
+def tokenize(text):
+    """Split already lowercased text into a set of words."""
+    return frozenset(WORD_PATTERN.findall(text))
+
+def token_overlap(query_tokens, text_tokens):
+    """Jaccard similarity between two word sets."""
+    shared = len(query_tokens & text_tokens)
+    if not shared:
+        return 0.0
+    return shared / len(query_tokens | text_tokens)
 
 def clean_query(query):
     """Clean and enhance the input query."""
     original = query.lower().strip()
     
     # For "what is" questions, try to get the main topic
-    what_is_match = re.match(r'what\s+is\s+(?:a|an|the)?\s*(.+)', original)
+    what_is_match = WHAT_IS_PATTERN.match(original)
     if what_is_match:
         return what_is_match.group(1).strip()
     
     # For other questions, remove question words and articles
-    query = re.sub(r"\b(what|who|where|when|how|is|are|was|were|a|an|the)\b", "", original)
-    query = re.sub(r'[^\w\s]', '', query)
-    return ' '.join(query.split())
+    return ' '.join(FILLER_PATTERN.sub('', original).split())
 
 def is_specific_article(title, summary):
     """Check if the article is about a specific instance rather than a general topic."""
-    specific_indicators = [
-        'is a', 'was a', 'refers to',
-        'born', 'died', 'located in',
-        'written by', 'directed by', 'created by'
-    ]
-    
     # Check if the title is capitalized (proper noun)
     if title.istitle() and not title.isupper():
-        first_sentence = summary.split('.')[0].lower()
-        return any(indicator in first_sentence for indicator in specific_indicators)
+        first_sentence = summary.split('.', 1)[0]
+        return SPECIFIC_INDICATOR_PATTERN.search(first_sentence) is not None
     return False
 
 def get_wikipedia_summary(query):
@@ -48,60 +115,64 @@ def get_wikipedia_summary(query):
 
         # First try exact search
         try:
-            direct_summary = wikipedia.summary(cleaned_query, sentences=2)
+            direct_summary = cached_summary(cleaned_query, sentences=2)
             if not is_specific_article(cleaned_query, direct_summary):
                 return f"Topic: {cleaned_query.title()}\nConfidence: High\n\n{direct_summary}"
-        except:
+        except FETCH_ERRORS:
             pass
 
         # If exact search fails, try search with suggestions
-        search_results = wikipedia.search(cleaned_query, results=8)
+        search_results = cached_search(cleaned_query, results=8)
         if not search_results:
             return "I couldn't find anything related to that query."
 
         # Score and filter results
+        query_tokens = tokenize(cleaned_query)
         scored_results = []
-        for result in search_results:
-            # Skip results with unwanted keywords
-            if any(word.lower() in result.lower() for word in UNWANTED_KEYWORDS):
-                continue
-                
+        
+        # Skip results with unwanted keywords, then fetch the rest concurrently
+        candidates = [result for result in search_results if not UNWANTED_PATTERN.search(result)]
+        summaries = [_executor.submit(cached_summary, result, 2) for result in candidates]
+        wants_definition = 'what is' in original_query
+        definition_phrase = f"{cleaned_query} is"
+        for result, future in zip(candidates, summaries):
             try:
-                summary = wikipedia.summary(result, sentences=2)
+                summary = future.result()
+                specific = is_specific_article(result, summary)
                 
                 # Skip if it's a specific article when we want a general definition
-                if 'what is' in original_query.lower() and is_specific_article(result, summary):
+                if wants_definition and specific:
                     continue
                 
                 # Calculate relevance score
-                score = calculate_relevance(cleaned_query, summary)
+                summary_lower = summary.lower()
+                score = calculate_relevance(cleaned_query, summary_lower, query_tokens)
                 
                 # Boost score for results that seem like definitions
-                if f"{cleaned_query} is" in summary.lower():
+                if definition_phrase in summary_lower:
                     score += 0.3
-                if not is_specific_article(result, summary):
+                if not specific:
                     score += 0.2
                     
                 scored_results.append((result, score, summary))
                 
-            except (wikipedia.exceptions.DisambiguationError, 
-                   wikipedia.exceptions.PageError):
+            except FETCH_ERRORS:
                 continue
 
         if not scored_results:
             return "I found some results, but they don't seem relevant to your question."
 
-        # Sort by relevance score
-        scored_results.sort(key=lambda x: x[1], reverse=True)
-        best_match = scored_results[0]
+        # Only the best match and up to two alternatives are used
+        top_results = heapq.nlargest(3, scored_results, key=lambda x: x[1])
+        best_match = top_results[0]
 
         # Format response
         confidence = "High" if best_match[1] > 0.6 else "Medium" if best_match[1] > 0.3 else "Low"
         response = f"Topic: {best_match[0]}\nConfidence: {confidence}\n\n{best_match[2]}"
         
         # Add suggestion if we have other good matches
-        if len(scored_results) > 1 and confidence != "High":
-            alternatives = [result[0] for result in scored_results[1:3]]
+        if len(top_results) > 1 and confidence != "High":
+            alternatives = [result[0] for result in top_results[1:]]
             response += f"\n\nRelated topics: {', '.join(alternatives)}"
             
         return response
@@ -113,18 +184,44 @@ def get_wikipedia_summary(query):
     except Exception as e:
         return f"An error occurred: {str(e)}"
 
-def calculate_relevance(query, text):
-    """Calculate relevance score between query and text."""
-    # Base similarity score
-    base_score = SequenceMatcher(None, query.lower(), text.lower()).ratio()
+def calculate_relevance(query, text, query_tokens=None):
+    """Calculate relevance score between query and text.
+    
+    Both query and text must already be lowercase; the caller lowers the
+    summary once and reuses it for its own checks.
+    """
+    if query_tokens is None:
+        query_tokens = tokenize(query)
+    
+    # Base similarity score: word overlap (Jaccard) between query and text
+    base_score = token_overlap(query_tokens, tokenize(text))
     
     # Boost score if query appears in the first sentence
-    first_sentence = text.split('.')[0].lower()
-    if query.lower() in first_sentence:
+    first_sentence = text.split('.')[0]
+    if query in first_sentence:
         base_score += 0.2
         
     return base_score
 
+# Answers to queries already asked this session; only successful answers are
+# stored so that errors and empty results can be retried
+RESPONSE_CACHE_SIZE = 256
+_response_cache = {}
+
+def cached_response(normalized_query):
+    """LRU-memoized get_wikipedia_summary for queries repeated within a session."""
+    if normalized_query in _response_cache:
+        # Move the hit to the end so the least recently used answer is evicted first
+        response = _response_cache[normalized_query] = _response_cache.pop(normalized_query)
+        return response
+    
+    response = get_wikipedia_summary(normalized_query)
+    if response.startswith("Topic:"):
+        if len(_response_cache) >= RESPONSE_CACHE_SIZE:
+            del _response_cache[next(iter(_response_cache))]  # Drop the least recently used answer
+        _response_cache[normalized_query] = response
+    return response
+
 def chatbot():
     print("Enhanced Wikipedia ")
     print("Ask me anything! Type 'exit' to quit.")
@@ -138,7 +235,7 @@ def chatbot():
             print("Please type a question!")
             continue
             
-        response = get_wikipedia_summary(query)
+        response = cached_response(' '.join(query.lower().split()))
         print("\nBot:", response)
 
 if __name__ == "__main__":